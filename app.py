@@ -17,31 +17,10 @@ UNIT_OPERATIONS = {
     "Deionización capacitiva (CDI)": {"As": 0.80, "Cl": 0.60},
 }
 
-# ======================================================
-# CONFIGURACIÓN DE PÁGINA
-# ======================================================
-st.set_page_config(
-    page_title="Optimización del mezclado de agua",
-    layout="wide"
-)
-
-# ======================================================
-# FLOWSHEET (SEGURO)
-# ======================================================
-try:
-    st.image(
-        "flowsheet.jpg",
-        caption="Diagrama conceptual del proceso",
-        use_container_width=True
-    )
-except Exception:
-    st.warning("⚠️ No se pudo cargar la imagen del flowsheet")
-
 # ======================================================
 # ESTILOS CSS
 # ======================================================
-st.markdown(
-    """
+CSS = """
     <style>
 
     /* ===== TABLAS ===== */
@@ -92,10 +71,76 @@ st.markdown(
     }
 
     </style>
-    """,
-    unsafe_allow_html=True
+    """
+
+METRIC_HTML = (
+    '<div class="{box}">'
+    '<div class="metric-label {text}">{label}</div>'
+    '<div class="metric-value {text}">{value}</div>'
+    '</div>'
 )
 
+
+# ======================================================
+# DATOS BASE DE POZOS
+# ======================================================
+@st.cache_data
+def default_wells():
+    return pd.DataFrame({
+        "Pozo": ["Pozo 1", "Pozo 2", "Pozo 3", "Pozo 4", "Pozo 5"],
+        "Qmax": [10, 50, 25, 50, 15],
+        "As": [0.004, 0.037, 0.0453, 0.0273, 0.0331],
+        "Cl": [272.3, 250.28, 226.25, 320.35, 188.21],
+        "Disponible": [True, True, True, True, True]
+    }).set_index("Pozo")
+
+
+# ======================================================
+# CACHÉ DEL OPTIMIZADOR
+# ======================================================
+def hash_df(df):
+    # Hash por filas de pandas: mucho más barato que serializar el DataFrame
+    return pd.util.hash_pandas_object(df, index=True).values.tobytes()
+
+
+HASH_FUNCS = {pd.DataFrame: hash_df}
+
+
+@st.cache_resource(max_entries=64, hash_funcs=HASH_FUNCS)
+def get_optimizer(df, w_As, w_Cl):
+    return WaterBlendOptimizer(df, w_As=w_As, w_Cl=w_Cl)
+
+
+@st.cache_data(max_entries=64, hash_funcs=HASH_FUNCS)
+def run_optimize(df, w_As, w_Cl, demand):
+    return get_optimizer(df, w_As, w_Cl).optimize(demand)
+
+
+# ======================================================
+# CONFIGURACIÓN DE PÁGINA
+# ======================================================
+st.set_page_config(
+    page_title="Optimización del mezclado de agua",
+    layout="wide"
+)
+
+# ======================================================
+# FLOWSHEET (SEGURO)
+# ======================================================
+try:
+    st.image(
+        "flowsheet.jpg",
+        caption="Diagrama conceptual del proceso",
+        use_container_width=True
+    )
+except Exception:
+    st.warning("⚠️ No se pudo cargar la imagen del flowsheet")
+
+# ======================================================
+# ESTILOS CSS
+# ======================================================
+st.markdown(CSS, unsafe_allow_html=True)
+
 # ======================================================
 # TÍTULO
 # ======================================================
@@ -158,17 +203,9 @@ st.sidebar.markdown(
 # ======================================================
 st.subheader("📊 Datos de los Pozos")
 
-df = pd.DataFrame({
-    "Pozo": ["Pozo 1", "Pozo 2", "Pozo 3", "Pozo 4", "Pozo 5"],
-    "Qmax": [10, 50, 25, 50, 15],
-    "As": [0.004, 0.037, 0.0453, 0.0273, 0.0331],
-    "Cl": [272.3, 250.28, 226.25, 320.35, 188.21],
-    "Disponible": [True, True, True, True, True]
-}).set_index("Pozo")
-
-df_edit = st.data_editor(df, use_container_width=True)
-df_edit["avail"] = df_edit["Disponible"].astype(int)
-df_edit = df_edit.drop(columns="Disponible")
+df_edit = st.data_editor(default_wells(), use_container_width=True)
+avail = df_edit["Disponible"].to_numpy().astype(np.int8, copy=False)
+df_edit = df_edit.assign(avail=avail).drop(columns="Disponible")
 
 # ======================================================
 # OPTIMIZACIÓN
@@ -179,8 +216,14 @@ if st.button("🚀 Ejecutar Optimización"):
         # ---------------------------
         # MEZCLA ÓPTIMA
         # ---------------------------
-        opt = WaterBlendOptimizer(df_edit, w_As=w_As, w_Cl=w_Cl)
-        Q_opt, As_f, Cl_f = opt.optimize(Demand)
+        # Reusar el último resultado si las entradas no cambiaron
+        last_key = (hash_df(df_edit), w_As, w_Cl, Demand)
+        if st.session_state.get("last_key") == last_key:
+            q_vec, As_f, Cl_f = st.session_state["last_result"]
+        else:
+            q_vec, As_f, Cl_f = run_optimize(df_edit, w_As, w_Cl, Demand)
+            st.session_state["last_key"] = last_key
+            st.session_state["last_result"] = (q_vec, As_f, Cl_f)
 
         st.success("Optimización completada correctamente")
 
@@ -193,23 +236,19 @@ if st.button("🚀 Ejecutar Optimización"):
 
         with col1:
             st.markdown(
-                f"""
-                <div class="metric-ok">
-                    <div class="metric-label ok-text">Arsénico mezcla (mg/L)</div>
-                    <div class="metric-value ok-text">{As_f:.5f}</div>
-                </div>
-                """,
+                METRIC_HTML.format(
+                    box="metric-ok", text="ok-text",
+                    label="Arsénico mezcla (mg/L)", value=f"{As_f:.5f}"
+                ),
                 unsafe_allow_html=True
             )
 
         with col2:
             st.markdown(
-                f"""
-                <div class="metric-ok">
-                    <div class="metric-label ok-text">Cloruros mezcla (mg/L)</div>
-                    <div class="metric-value ok-text">{Cl_f:.2f}</div>
-                </div>
-                """,
+                METRIC_HTML.format(
+                    box="metric-ok", text="ok-text",
+                    label="Cloruros mezcla (mg/L)", value=f"{Cl_f:.2f}"
+                ),
                 unsafe_allow_html=True
             )
 
@@ -218,8 +257,10 @@ if st.button("🚀 Ejecutar Optimización"):
         # ---------------------------
         st.subheader("💧 Caudales óptimos por pozo")
 
-        df_Q = pd.DataFrame.from_dict(Q_opt, orient="index", columns=["Caudal (LPS)"])
-        df_Q = df_Q[df_Q["Caudal (LPS)"] > 1e-3]
+        mask = q_vec > 1e-3
+        df_Q = pd.DataFrame(
+            {"Caudal (LPS)": q_vec[mask]}, index=df_edit.index[mask]
+        )
         st.dataframe(df_Q, use_container_width=True)
 
         # ======================================================
@@ -263,16 +304,10 @@ if st.button("🚀 Ejecutar Optimización"):
 
         with col1:
             st.markdown(
-                f"""
-                <div class="{as_class}">
-                    <div class="metric-label {as_text}">
-                        Arsénico producto (mg/L)
-                    </div>
-                    <div class="metric-value {as_text}">
-                        {As_product:.5f}
-                    </div>
-                </div>
-                """,
+                METRIC_HTML.format(
+                    box=as_class, text=as_text,
+                    label="Arsénico producto (mg/L)", value=f"{As_product:.5f}"
+                ),
                 unsafe_allow_html=True
             )
 
@@ -288,16 +323,10 @@ if st.button("🚀 Ejecutar Optimización"):
 
         with col2:
             st.markdown(
-                f"""
-                <div class="{cl_class}">
-                    <div class="metric-label {cl_text}">
-                        Cloruros producto (mg/L)
-                    </div>
-                    <div class="metric-value {cl_text}">
-                        {Cl_product:.2f}
-                    </div>
-                </div>
-                """,
+                METRIC_HTML.format(
+                    box=cl_class, text=cl_text,
+                    label="Cloruros producto (mg/L)", value=f"{Cl_product:.2f}"
+                ),
                 unsafe_allow_html=True
             )
 
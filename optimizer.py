@@ -1,45 +1,84 @@
 # optimizer.py
-import pandas as pd
-from pulp import LpProblem, LpVariable, LpMinimize, lpSum, PULP_CBC_CMD
+import numpy as np
 
 class WaterBlendOptimizer:
 
     def __init__(self, df, w_As=0.3, w_Cl=0.7, As_ref=0.025, Cl_ref=320):
-        self.df = df.copy()
         self.w_As = w_As
         self.w_Cl = w_Cl
         self.As_ref = As_ref
         self.Cl_ref = Cl_ref
+
+        self._AsCl = np.vstack([
+            df["As"].to_numpy(dtype=np.float64),
+            df["Cl"].to_numpy(dtype=np.float64)
+        ])
+        self._as, self._cl = self._AsCl
+        self._qmax = df["Qmax"].to_numpy(dtype=np.float64, copy=True)
+        self._avail = df["avail"].to_numpy(dtype=np.int8, copy=True)
         self._compute_scores()
 
     def _compute_scores(self):
-        self.df["score"] = (
-            self.w_As * (self.df["As"] / self.As_ref) +
-            self.w_Cl * (self.df["Cl"] / self.Cl_ref)
-        ) / (self.df["avail"] + 1e-6)
+        self._score = (
+            self.w_As * self._as / self.As_ref +
+            self.w_Cl * self._cl / self.Cl_ref
+        ) / (self._avail + 1e-6)
+        # El orden de llenado solo depende de scores y capacidades: se
+        # calcula una vez y lo reutilizan todas las demandas
+        self._fill = self._fill_order()
+
+    def _fill_order(self):
+        # LP continuo con una sola restricción de demanda: el óptimo
+        # llena los pozos en orden ascendente de score hasta cubrirla
+        order = np.argsort(self._score, kind="stable")
+        caps = (self._qmax * self._avail)[order]
+        return order, caps, np.cumsum(caps)
 
     def optimize(self, demand):
 
-        Qmax_available = (self.df["Qmax"] * self.df["avail"]).sum()
+        order, caps, cum = self._fill
+
+        Qmax_available = cum[-1]
         if demand > Qmax_available:
             raise ValueError("La demanda supera la capacidad disponible")
 
-        prob = LpProblem("WaterBlending", LpMinimize)
+        k = int(np.searchsorted(cum, demand))
+
+        q = np.zeros(len(caps))
+        q[order[:k]] = caps[:k]
+        if k < len(caps):
+            q[order[k]] = demand - (cum[k - 1] if k else 0.0)
+
+        Qt = q.sum()
+        As_final, Cl_final = (self._AsCl @ q) / Qt
 
-        Q = {
-            p: LpVariable(f"Q_{p}", 0, self.df.loc[p, "Qmax"])
-            for p in self.df.index
-        }
+        # q queda alineado con las filas del DataFrame de entrada
+        return q, As_final, Cl_final
 
-        prob += lpSum(Q[p] * self.df.loc[p, "score"] for p in self.df.index)
-        prob += lpSum(Q[p] for p in self.df.index) == demand
+    def sweep(self, Ds):
+        # As y Cl de la mezcla óptima para cada demanda en Ds; las demandas
+        # no positivas o que superan la capacidad disponible quedan en NaN
+        Ds = np.asarray(Ds, dtype=np.float64)
+        order, caps, cum_q = self._fill
+        as_sorted = self._as[order]
+        cl_sorted = self._cl[order]
 
-        prob.solve(PULP_CBC_CMD(msg=False))
+        # Acumulados antes de cada pozo (el primero parte de cero)
+        cum_q = np.concatenate(([0.0], cum_q))
+        cum_as = np.concatenate(([0.0], np.cumsum(caps * as_sorted)))
+        cum_cl = np.concatenate(([0.0], np.cumsum(caps * cl_sorted)))
 
-        Q_opt = {p: Q[p].value() for p in self.df.index}
+        # Pozo que recibe el llenado parcial para cada demanda
+        k = np.searchsorted(cum_q[1:], Ds)
+        feasible = (k < len(caps)) & (Ds > 0)
+        k = np.minimum(k, len(caps) - 1)
+        rem = Ds - cum_q[k]
 
-        Qt = sum(Q_opt.values())
-        As_final = sum(Q_opt[p] * self.df.loc[p, "As"] for p in self.df.index) / Qt
-        Cl_final = sum(Q_opt[p] * self.df.loc[p, "Cl"] for p in self.df.index) / Qt
+        As_arr = np.full(Ds.shape, np.nan)
+        Cl_arr = np.full(Ds.shape, np.nan)
+        np.divide(cum_as[k] + rem * as_sorted[k], Ds,
+                  out=As_arr, where=feasible)
+        np.divide(cum_cl[k] + rem * cl_sorted[k], Ds,
+                  out=Cl_arr, where=feasible)
 
-        return Q_opt, As_final, Cl_final
+        return As_arr, Cl_arr
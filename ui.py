@@ -2,12 +2,8 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
 
-from pulp import (
-    LpProblem, LpVariable, LpMinimize,
-    lpSum, PULP_CBC_CMD
-)
+from optimizer import WaterBlendOptimizer
 
 
 # ==================================================
@@ -27,47 +23,65 @@ UNIT_OPERATIONS = {
 # ==================================================
 # OPTIMIZADOR DE BLENDING
 # ==================================================
-def optimize_blending(df, demand, w_as=0.2, w_cl=0.8,
-                      As_ref=0.025, Cl_ref=35):
+# Pesos y referencias propios de esta interfaz; el llenado greedy por
+# score es el de WaterBlendOptimizer
+BLEND_PARAMS = {"w_As": 0.2, "w_Cl": 0.8, "As_ref": 0.025, "Cl_ref": 35}
 
-    df = df.copy()
 
-    # Score tipo Aspen-like
-    df["score"] = (
-        w_as * (df["As"] / As_ref) +
-        w_cl * (df["Cl"] / Cl_ref)
-    ) / (df["avail"] + 1e-6)
+# ==================================================
+# CACHÉ ENTRE RERUNS
+# ==================================================
+def well_key(df):
+    # Tupla hashable con los parámetros de los pozos
+    return (
+        tuple(df.index),
+        tuple(df["Qmax"]),
+        tuple(df["As"]),
+        tuple(df["Cl"]),
+        tuple(df["avail"])
+    )
 
-    Qmax_available = (df["Qmax"] * df["avail"]).sum()
-    if demand > Qmax_available:
-        raise ValueError("La demanda supera la capacidad disponible")
 
-    prob = LpProblem("WaterBlending", LpMinimize)
+@st.cache_resource(max_entries=64)
+def get_optimizer(key, _df):
+    # key identifica a _df; el DataFrame en sí no se hashea
+    return WaterBlendOptimizer(_df, **BLEND_PARAMS)
 
-    Q = {
-        p: LpVariable(
-            f"Q_{p}",
-            lowBound=0,
-            upBound=df.loc[p, "Qmax"] * df.loc[p, "avail"]
-        )
-        for p in df.index
-    }
 
-    # Objetivo
-    prob += lpSum(Q[p] * df.loc[p, "score"] for p in df.index)
+@st.cache_data(show_spinner=False, max_entries=64)
+def cached_optimize(key, _df, demand):
+    return get_optimizer(key, _df).optimize(demand)
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def cached_trend(key, _df):
+    # Solo demandas factibles: no hace falta capturar excepciones
+    Qmax_total = float((
+        _df["Qmax"].to_numpy() * _df["avail"].to_numpy()
+    ).sum())
+    Ds = np.arange(10, int(Qmax_total) + 1, 2)
+    As_arr, Cl_arr = get_optimizer(key, _df).sweep(Ds)
+
+    return Ds, As_arr, Cl_arr
 
-    # Restricción de demanda
-    prob += lpSum(Q[p] for p in df.index) == demand
 
-    prob.solve(PULP_CBC_CMD(msg=False))
+@st.cache_resource
+def flowsheet_image():
+    with open("main/flowsheet.png", "rb") as f:
+        return f.read()
 
-    Q_opt = {p: Q[p].value() for p in df.index}
 
-    Qt = sum(Q_opt.values())
-    As_final = sum(Q_opt[p] * df.loc[p, "As"] for p in df.index) / Qt
-    Cl_final = sum(Q_opt[p] * df.loc[p, "Cl"] for p in df.index) / Qt
+@st.cache_data
+def base_wells():
+    data = {
+        "Pozo": ["Pozo 1", "Pozo 2", "Pozo 3", "Pozo 4", "Pozo 5"],
+        "Qmax": [10, 50, 25, 50, 15],
+        "As": [0.004, 0.037, 0.0453, 0.0273, 0.0331],
+        "Cl": [272.3, 250.28, 226.25, 320.35, 188.21],
+        "avail": [1, 1, 1, 1, 1]
+    }
 
-    return Q_opt, As_final, Cl_final
+    return pd.DataFrame(data).set_index("Pozo")
 
 
 # ==================================================
@@ -78,7 +92,7 @@ def render_ui():
     st.subheader("🧩 Flowsheet del proceso")
 
     st.image(
-        "main/flowsheet.png",
+        flowsheet_image(),
         caption="Esquema conceptual del sistema de tratamiento",
         use_container_width=True
     )
@@ -87,15 +101,7 @@ def render_ui():
     # ---------------------------
     # Datos base
     # ---------------------------
-    data = {
-        "Pozo": ["Pozo 1", "Pozo 2", "Pozo 3", "Pozo 4", "Pozo 5"],
-        "Qmax": [10, 50, 25, 50, 15],
-        "As": [0.004, 0.037, 0.0453, 0.0273, 0.0331],
-        "Cl": [272.3, 250.28, 226.25, 320.35, 188.21],
-        "avail": [1, 1, 1, 1, 1]
-    }
-
-    df = pd.DataFrame(data).set_index("Pozo")
+    df = base_wells()
 
     # ---------------------------
     # SIDEBAR – Inputs
@@ -134,9 +140,8 @@ def render_ui():
     if st.button("🚀 Ejecutar optimización"):
 
         try:
-            Q_opt, As_f, Cl_f = optimize_blending(
-                edited_df, demand
-            )
+            key = well_key(edited_df)
+            q_arr, As_f, Cl_f = cached_optimize(key, edited_df, demand)
 
             # -----------------------
             # Resultados numéricos
@@ -153,8 +158,8 @@ def render_ui():
             # -----------------------
             st.subheader("📊 Caudales óptimos")
 
-            result_df = pd.DataFrame.from_dict(
-                Q_opt, orient="index", columns=["Q óptimo (L/s)"]
+            result_df = pd.DataFrame(
+                {"Q óptimo (L/s)": q_arr}, index=edited_df.index
             )
 
             st.dataframe(result_df, use_container_width=True)
@@ -164,29 +169,29 @@ def render_ui():
             # -----------------------
             st.subheader("📈 Tendencia de concentraciones")
 
-            Ds = np.arange(10, int(edited_df["Qmax"].sum()), 2)
-            As_list, Cl_list = [], []
-
-            for d in Ds:
-                try:
-                    _, A, C = optimize_blending(edited_df, d)
-                    As_list.append(A)
-                    Cl_list.append(C)
-                except:
-                    pass
+            Ds, As_arr, Cl_arr = cached_trend(key, edited_df)
 
-            fig, ax1 = plt.subplots()
-            ax2 = ax1.twinx()
+            import altair as alt
 
-            ax1.plot(Ds[:len(As_list)], As_list, label="As")
-            ax2.plot(Ds[:len(Cl_list)], Cl_list, "r--", label="Cl")
-
-            ax1.set_xlabel("Demanda (L/s)")
-            ax1.set_ylabel("Arsénico (mg/L)")
-            ax2.set_ylabel("Cloruros (mg/L)")
+            # Doble eje Y con Altair: se dibuja en el navegador, sin
+            # rasterizar una figura de Matplotlib en el servidor
+            chart_df = pd.DataFrame({"Demanda": Ds, "As": As_arr, "Cl": Cl_arr})
+            base = alt.Chart(chart_df).encode(
+                x=alt.X("Demanda:Q", title="Demanda (L/s)")
+            )
+            as_line = base.mark_line().encode(
+                y=alt.Y("As:Q", title="Arsénico (mg/L)",
+                        scale=alt.Scale(zero=False))
+            )
+            cl_line = base.mark_line(color="red", strokeDash=[6, 4]).encode(
+                y=alt.Y("Cl:Q", title="Cloruros (mg/L)",
+                        scale=alt.Scale(zero=False))
+            )
 
-            fig.tight_layout()
-            st.pyplot(fig)
+            st.altair_chart(
+                alt.layer(as_line, cl_line).resolve_scale(y="independent"),
+                use_container_width=True
+            )
 
         except Exception as e:
             st.error(str(e))